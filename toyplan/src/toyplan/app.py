@@ -5,7 +5,14 @@ import toga
 from toga.style import Pack
 from toga.style.pack import COLUMN, ROW
 import pickle
-from datetime import date,timedelta
+import heapq
+import time
+import os
+import json
+import asyncio
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+from datetime import date,datetime,timedelta
 
 
 '''数据结构模块.'''
@@ -15,9 +22,15 @@ class Goal:
     def __init__(self, name, subgroup=None):
         self.name = name
         self.subgroup = subgroup if not subgroup is None else list()
+        self.version = 0 #子树(任务组, 任务)每次变化加一, 用于页面缓存失效
 
     def add(self, group):
         self.subgroup.append(group)
+        self.changed()
+
+    def changed(self):
+        """目标下的任务组或任务发生了变化."""
+        self.version += 1
 
     def __repr__(self):
         return f"Goal({self.name})"
@@ -40,6 +53,7 @@ class Group:
 
     def add(self, task):
         self.subtask.append(task)
+        self.parent_goal.changed()
 
     def __repr__(self):
         return f"Group({self.name})"
@@ -79,14 +93,18 @@ class Task:
         self.description=description
         self.finished_times= 0
         self.is_finished=False
+        self.finish_date=None #完成的日期
+        self.reminders=[] #任务的提醒
 
         self.parent_group.add(self)
     
     def finish(self):
         """任务按钮被点击时, 做出的所有反应"""
         self.finished_times += 1
+        self.parent_group.parent_goal.changed()
         if self.finished_times == self.excp_times:
             self.is_finished = True
+            self.finish_date = tuple(Date.today())
           
     def __iter__(self):
             yield 'name', self.name
@@ -100,6 +118,8 @@ class Task:
             yield 'description', self.description
             yield 'finished_times', self.finished_times
             yield 'is_finished', self.is_finished
+            yield 'finish_date', self.finish_date
+            yield 'reminders', self.reminders
 
 
     def __str__(self):
@@ -110,6 +130,151 @@ class Task:
 
     def __repr__(self):
         return f"Task({self.name})"
+
+
+#任务依赖图
+class TaskGraph:
+    """任务依赖图(有向无环图).
+
+    边before->after表示after必须等before完成后才能开始.
+    用动态拓扑序(Pearce-Kelly)维护顺序, 加边时只调整受影响的区间;
+    任务完成后只重新计算它的下游任务.
+    """
+    def __init__(self):
+        self.successors = {} #任务 -> 后继任务的集合
+        self.predecessors = {} #任务 -> 前置任务的集合
+        self.order = {} #任务 -> 拓扑序号
+        self.next_order = 0
+        self.earliest_start = {} #任务 -> 最早开始日期
+        self.earliest_finish = {} #任务 -> 最早完成日期
+        self.critical_pred = {} #任务 -> 决定其最早开始日期的前置任务
+        self.ready = {} #任务 -> 后继任务最早可以开始的日期
+
+    def add_task(self, task):
+        """加入一个没有依赖的任务."""
+        if task in self.order:
+            return
+        self.order[task] = self.next_order
+        self.next_order += 1
+        self.successors[task] = set()
+        self.predecessors[task] = set()
+        self._compute(task)
+
+    def add_edge(self, before, after):
+        """加入依赖before->after, 会产生环时抛出ValueError."""
+        self.add_task(before)
+        self.add_task(after)
+        if after in self.successors[before]:
+            return
+        if before is after:
+            raise ValueError(f"任务{before.name}不能依赖自己")
+        if self.order[after] < self.order[before]:
+            self._reorder(before, after)
+        self.successors[before].add(after)
+        self.predecessors[after].add(before)
+        self._propagate([after])
+
+    def _search(self, task, edges, in_range):
+        """从task出发沿edges搜索拓扑序在in_range内的任务."""
+        found = {task}
+        stack = [task]
+        while stack:
+            for other in edges[stack.pop()]:
+                if other not in found and in_range(self.order[other]):
+                    found.add(other)
+                    stack.append(other)
+        return found
+
+    def _reorder(self, before, after):
+        """加入before->after前, 只重排两者之间受影响的任务."""
+        lower, upper = self.order[after], self.order[before]
+        forward = self._search(after, self.successors, lambda i: i <= upper)
+        if before in forward:
+            raise ValueError(f"依赖{before.name}->{after.name}会产生环")
+        backward = self._search(before, self.predecessors, lambda i: i >= lower)
+
+        #前置的一侧排在前面, 各自保持原有的相对顺序
+        tasks = sorted(backward, key=self.order.get) + sorted(forward, key=self.order.get)
+        slots = sorted(self.order[task] for task in tasks)
+        for task, slot in zip(tasks, slots):
+            self.order[task] = slot
+
+    def _ready_date(self, task):
+        """task的后继任务最早可以开始的日期."""
+        if task.is_finished and task.finish_date is not None:
+            return date(*task.finish_date)
+        return self.earliest_finish[task] + timedelta(days=1)
+
+    def _compute(self, task):
+        """重新计算task的最早开始/完成日期, 返回后继任务能开始的日期是否有变化."""
+        start = date(*task.start_date)
+        critical_pred = None
+        for pred in self.predecessors[task]:
+            ready = self.ready[pred]
+            if ready > start:
+                start, critical_pred = ready, pred
+
+        if task.is_finished and task.finish_date is not None:
+            finish = date(*task.finish_date)
+        else:
+            remaining = max(task.excp_times - task.finished_times - 1, 0)
+            finish = start + timedelta(days=remaining*task.date_step)
+            #没完成的任务最早今天完成, 后继任务最早明天开始
+            finish = max(finish, date.today())
+
+        self.earliest_start[task] = start
+        self.earliest_finish[task] = finish
+        self.critical_pred[task] = critical_pred
+        ready = self._ready_date(task)
+        #完成任务时完成日期可能不变, 但后继任务可以提前开始
+        changed = self.ready.get(task) != ready
+        self.ready[task] = ready
+        return changed
+
+    def _propagate(self, tasks):
+        """按拓扑序重算tasks, 只有结果变化时才继续向下游传播."""
+        heap = [(self.order[task], task) for task in tasks]
+        heapq.heapify(heap)
+        queued = set(tasks)
+        while heap:
+            _, task = heapq.heappop(heap)
+            queued.discard(task)
+            if self._compute(task):
+                for succ in self.successors[task]:
+                    if succ not in queued:
+                        queued.add(succ)
+                        heapq.heappush(heap, (self.order[succ], succ))
+
+    def update(self, task):
+        """task的状态(如完成次数)改变后, 重新计算它和它的下游."""
+        if task in self.order:
+            self._propagate([task])
+
+    def recompute(self):
+        """按拓扑序重新计算全部任务."""
+        for task in sorted(self.order, key=self.order.get):
+            self._compute(task)
+
+    def is_ready(self, task):
+        """前置任务是否都已完成."""
+        return all(pred.is_finished for pred in self.predecessors.get(task, ()))
+
+    def start_date(self, task):
+        """考虑依赖之后task的最早开始日期."""
+        if task in self.earliest_start:
+            return self.earliest_start[task]
+        return date(*task.start_date)
+
+    def critical_path(self):
+        """返回最晚完成的任务所在的关键路径(从前到后)."""
+        if not self.earliest_finish:
+            return []
+        task = max(self.earliest_finish, key=lambda task: (self.earliest_finish[task], -self.order[task]))
+        path = [task]
+        while self.critical_pred[path[-1]] is not None:
+            path.append(self.critical_pred[path[-1]])
+        return path[::-1]
+
       
 #数据类
 class Data:
@@ -135,18 +300,35 @@ class Data:
         self.past_task = []
         self.today_finish = []
         self.active_task = self.today_task.copy()
+        self.task_graph = TaskGraph() #任务依赖图
+        for task in self.active_task:
+            self.task_graph.add_task(task)
+
+        #待触发的提醒. 目前Data还没有保存到本地, 每次启动都是空的;
+        #以后保存Data(连同Task.reminders)时, 启动就能从上次处理到的时间补发错过的提醒.
+        self.reminder_wheel = TimerWheel(to_minute(datetime.now()))
 
         self.is_first_time_opened = True #是否初次打开
         self.first_time_opened = tuple(Date.today()) #初次打开的日期
+        self.version = 0 #数据版本号, 每次更新加一
+        self.last_update_date = date.today() #上次更新的日期
     
     def update(self):
         """
         处理Data里面的数据, 更新状态.
         """
+        self.version += 1
+        #没完成的任务最早今天完成, 过了零点要重新计算依赖
+        if self.last_update_date != date.today():
+            self.task_graph.recompute()
+            self.last_update_date = date.today()
         self.today_task.clear()
         for task in self.active_task:
             #今天的任务
             if date(*task.start_date) <= date.today() <= date(*task.end_date):
+                #前置任务没有完成, 今天还不能开始
+                if not self.task_graph.is_ready(task):
+                    continue
                 #加入今天的任务
                 self.today_task.append(task)
 
@@ -165,6 +347,39 @@ class Data:
             #将来的任务
             else:
                 pass
+
+    def schedule(self, days=7):
+        """接下来days天的日程, 返回{第几天:任务列表}.
+
+        等待前置任务的任务显示在预计可以开始的日期, 用task_graph.is_ready区分.
+        """
+        schedule = {i:list() for i in range(days)}
+        for task in self.active_task:
+
+            #考虑依赖之后的开始日期
+            start_date = self.task_graph.start_date(task)
+
+            #添加任务
+            if (date.today()-start_date).days >=0 or not self.task_graph.is_ready(task): #如果任务已经开始或在等待前置任务
+
+                for i in range(
+                    max((start_date-date.today()).days, 0), 
+                    min((date(*task.end_date)-date.today()).days+1 ,days), 
+                    task.date_step):
+
+                    schedule[i].append(task)
+        return schedule
+
+    def statistics(self):
+        """统计数据."""
+        return {
+            "first_time_opened": self.first_time_opened,
+            "goals": len(self.all_goals),
+            "tasks": len(self.active_task)+len(self.past_task)-len(self.today_finish),
+            "today_finished": len(self.today_finish),
+            "finished": len(self.past_task),
+            "critical_path": [task.name for task in self.task_graph.critical_path()],
+        }
             
 
 
@@ -173,6 +388,222 @@ class Date(date):
     def __iter__(self):
         return iter((self.year, self.month, self.day))
 
+
+############################################
+'''提醒模块.'''
+
+def to_minute(moment):
+    """datetime转换为分钟数(时间轮的时间单位)."""
+    return int(moment.timestamp()) // 60
+
+
+#提醒
+class Reminder:
+    """任务提醒类.
+
+    在任务的执行日(从start_date开始每date_step天一次)的time_of_day,
+    提前minutes_before分钟提醒; repeat为False时只提醒第一次.
+    """
+    def __init__(self, task, time_of_day=(9, 0), minutes_before=0, repeat=True):
+        self.task = task
+        self.time_of_day = tuple(time_of_day)
+        self.minutes_before = minutes_before
+        self.repeat = repeat
+
+    def _fire_minute(self, day):
+        return to_minute(datetime(day.year, day.month, day.day, *self.time_of_day)) - self.minutes_before
+
+    def next_fire(self, after):
+        """返回晚于after(分钟)的下一次提醒时间, 没有则返回None."""
+        if self.task.is_finished:
+            return None
+        start = date(*self.task.start_date)
+        first = self._fire_minute(start)
+        if after < first:
+            times = 0
+        elif not self.repeat:
+            return None
+        else:
+            times = (after - first) // (self.task.date_step*24*60) + 1
+
+        day = start + timedelta(days=times*self.task.date_step)
+        if day > date(*self.task.end_date):
+            return None
+        #夏令时等情况下按日期重新计算, 保证晚于after
+        fire = self._fire_minute(day)
+        return fire if fire > after else self.next_fire(fire)
+
+    def __str__(self):
+        text = f"{self.task.name} {self.time_of_day[0]:02d}:{self.time_of_day[1]:02d}"
+        if self.minutes_before:
+            text += f"(提前{self.minutes_before}分钟)"
+        return text
+
+    def __repr__(self):
+        return f"Reminder({self.task.name})"
+
+
+#分层时间轮
+class TimerWheel:
+    """分层时间轮.
+
+    时间单位为分钟, 共LEVELS层, 每层SLOTS格, 第k层每格跨度SLOTS**k分钟.
+    插入和取消都是O(1); 推进时跳过空的层, 应用关闭很久后也能快速补上.
+    """
+    BITS = 6
+    SLOTS = 1 << BITS
+    MASK = SLOTS - 1
+    LEVELS = 5
+
+    def __init__(self, current):
+        self.current = current #下一个要处理的分钟
+        self.levels = [[set() for _ in range(self.SLOTS)] for _ in range(self.LEVELS)]
+        self.counts = [0] * self.LEVELS
+        self.where = {} #条目 -> (到期时间, 层, 格)
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, entry):
+        return entry in self.where
+
+    def insert(self, entry, expiry):
+        """在expiry(分钟)时触发entry, 已在轮中的条目会被移动."""
+        self.cancel(entry)
+        delta = expiry - self.current
+        level = 0
+        while level < self.LEVELS - 1 and delta >= 1 << (self.BITS*(level+1)):
+            level += 1
+        index = (max(expiry, self.current) >> (self.BITS*level)) & self.MASK
+        self.levels[level][index].add(entry)
+        self.counts[level] += 1
+        self.where[entry] = (expiry, level, index)
+
+    def cancel(self, entry):
+        """取消entry, 不在轮中时什么也不做."""
+        if entry not in self.where:
+            return
+        _, level, index = self.where.pop(entry)
+        self.levels[level][index].discard(entry)
+        self.counts[level] -= 1
+
+    def _next_boundary(self, lowest=0):
+        """从lowest层开始, 下一个可能有条目到期或下沉的时间."""
+        for level in range(lowest, self.LEVELS):
+            if self.counts[level]:
+                width = 1 << (self.BITS*level)
+                return (self.current // width + 1) * width
+        return None
+
+    def _cascade(self):
+        """到达高层格子的边界时, 把格子里的条目重新分配到低层."""
+        for level in range(self.LEVELS - 1, 0, -1):
+            if self.current & ((1 << (self.BITS*level)) - 1):
+                continue
+            slot = self.levels[level][(self.current >> (self.BITS*level)) & self.MASK]
+            if not slot:
+                continue
+            entries = [(self.where[entry][0], entry) for entry in slot]
+            for expiry, entry in entries:
+                self.insert(entry, expiry)
+
+    def advance(self, now):
+        """推进到now(分钟), 按到期时间返回所有到期的(到期时间, 条目)."""
+        due = []
+        while self.current <= now:
+            slot = self.levels[0][self.current & self.MASK]
+            for entry in list(slot):
+                due.append((self.where[entry][0], entry))
+                self.cancel(entry)
+
+            boundary = self._next_boundary()
+            if boundary is None or boundary > now + 1:
+                self.current = now + 1
+                break
+            self.current = boundary
+            self._cascade()
+        due.sort(key=lambda item: item[0])
+        return due
+
+    def next_wakeup(self):
+        """下一次需要推进的时间(分钟), 轮为空时返回None.
+
+        高层格子可能比第0层最早的格子先下沉, 所以取两者中较早的.
+        """
+        candidates = []
+        if self.counts[0]:
+            for offset in range(self.SLOTS):
+                if self.levels[0][(self.current + offset) & self.MASK]:
+                    candidates.append(self.current + offset)
+                    break
+        boundary = self._next_boundary(lowest=1)
+        if boundary is not None:
+            candidates.append(boundary)
+        return min(candidates) if candidates else None
+
+
+#提醒调度器
+class ReminderScheduler:
+    """提醒调度器.
+
+    在toga的asyncio事件循环上只保留一个唤醒句柄, 同一时刻到期的提醒合并成一次通知.
+    启动时把时间轮从上次处理到的时间推进到现在(Data保存到本地后即可补发错过的提醒).
+    """
+    def __init__(self, data, loop, on_remind):
+        self.data = data
+        self.loop = loop
+        self.on_remind = on_remind #参数为到期提醒的列表
+        self.handle = None #唯一的唤醒句柄
+        self.wakeup = None #句柄对应的时间(分钟)
+
+    def start(self):
+        """补发错过的提醒并开始计时."""
+        self.tick()
+
+    def add(self, reminder):
+        """加入提醒, 从下一次提醒时间开始计时."""
+        #时间轮空闲时current不会前进, 所以从现在开始算
+        expiry = reminder.next_fire(to_minute(datetime.now()) - 1)
+        if expiry is None:
+            return
+        self.data.reminder_wheel.insert(reminder, expiry)
+        self._rearm()
+
+    def cancel(self, reminder):
+        """取消提醒. 多余的一次唤醒无害, 所以不重排句柄."""
+        self.data.reminder_wheel.cancel(reminder)
+
+    def tick(self):
+        """唤醒时的回调: 推进时间轮, 发出通知, 安排重复的提醒."""
+        self.handle = None
+        self.wakeup = None
+        wheel = self.data.reminder_wheel
+        now = to_minute(datetime.now())
+
+        reminders = []
+        for expiry, reminder in wheel.advance(now):
+            if reminder.task.is_finished:
+                continue
+            reminders.append(reminder)
+            #错过的多次重复只补发一次
+            next_expiry = reminder.next_fire(max(expiry, now))
+            if next_expiry is not None:
+                wheel.insert(reminder, next_expiry)
+
+        if reminders:
+            self.on_remind(reminders)
+        self._rearm()
+
+    def _rearm(self):
+        """把唯一的唤醒句柄安排到时间轮下一次需要推进的时间."""
+        wakeup = self.data.reminder_wheel.next_wakeup()
+        if wakeup is None or (self.handle is not None and self.wakeup <= wakeup):
+            return
+        if self.handle is not None:
+            self.handle.cancel()
+        self.wakeup = wakeup
+        self.handle = self.loop.call_later(max(wakeup*60 - time.time(), 0), self.tick)
+
 ############################################
 '''定制界面模块.'''
 
@@ -213,8 +644,7 @@ class Task_interface(toga.Box):
         def task_on_press(task):
             def func(widget):
                 """点击的反应:修改label,取消button, 弹出弹窗, 修改task"""
-                task.finish()
-                self.data.update()
+                self.app.finish_task(task)
                 if task.is_finished:
                     task.label.text = "(已完成)" + task.label.text
                     task.button.enabled = False
@@ -267,18 +697,7 @@ class Schedule_interface(toga.Box):
 
         self.box = toga.Box(style=Pack(direction=COLUMN, flex=1))
 
-        schedule = {i:list() for i in range(7)}
-        for task in self.data.active_task:
-
-            #添加任务
-            if (date.today()-date(*task.start_date)).days >=0: #如果任务已经开始
-
-                for i in range(
-                    max((date(*task.start_date)-date.today()).days, 0), 
-                    min((date(*task.end_date)-date.today()).days+1 ,7), 
-                    task.date_step):
-
-                    schedule[i].append(task)
+        schedule = self.data.schedule(days=7)
 
         for i in schedule:
             if len(schedule[i])>0:
@@ -292,7 +711,7 @@ class Schedule_interface(toga.Box):
                 task_list = toga.Box(
                     children=[toga.Box(
                         children=[
-                            toga.Label("任务名:"+task.name+f"[{task.parent_group.parent_goal.name}]({task.parent_group.name}), 已完成{task.finished_times}次/{task.excp_times}次"),
+                            toga.Label(("" if self.data.task_graph.is_ready(task) else "(等待前置任务)")+"任务名:"+task.name+f"[{task.parent_group.parent_goal.name}]({task.parent_group.name}), 已完成{task.finished_times}次/{task.excp_times}次"),
                             toga.Label("    ->任务描述:"+(task.description if len(task.description) <20 else "\t"+task.description[:20]+"...") ),
                             toga.Label("----------")
                         ],
@@ -321,8 +740,26 @@ class Goal_interface(toga.Box):
         self.style.flex = 1
         self.name = "目标"
         self.data = data
+        self.page_cache = OrderedDict() #目标 -> (版本, 页面), 最近使用的在最后
+        self.page_cache_size = 8
 
         self.update()
+
+    def page(self, goal):
+        """取得目标的页面, 目标没有变化时复用缓存."""
+        cached = self.page_cache.get(goal)
+        if cached is not None and cached[0] == goal.version:
+            self.page_cache.move_to_end(goal)
+            return cached[1]
+
+        page = goal.build_page()
+        self.page_cache[goal] = (goal.version, page)
+        self.page_cache.move_to_end(goal)
+        #超过上限时丢弃最久没用的页面
+        while len(self.page_cache) > self.page_cache_size:
+            self.page_cache.popitem(last=False)
+        return page
+
     def update(self):
         self.clear()
         self.box = toga.Box(style=Pack(direction=COLUMN, flex=1))
@@ -346,7 +783,7 @@ class Goal_interface(toga.Box):
         def goal_on_press(goal):
             def func(widget):
                 self.task_box.clear()
-                self.task_box.add(goal.build_page())
+                self.task_box.add(self.page(goal))
                 self.goal = goal
             ## 切换函数
             return func
@@ -374,7 +811,7 @@ class Goal_interface(toga.Box):
 
         # 加载默认的布局
         self.goal = self.data.all_goals[0]
-        self.task_box.add(self.data.all_goals[0].build_page())
+        self.task_box.add(self.page(self.data.all_goals[0]))
         self.box.add(
             self.nevigating_box, 
             self.new_group_button, 
@@ -408,13 +845,15 @@ class Statics_interface(toga.Box):
         self.clear()
         self.box = toga.Box(style=Pack(direction=COLUMN, flex=1))
 
+        statistics = self.data.statistics()
         labels = {}
         labels['打招呼'] = toga.Label(text='Ciallo! 欢迎使用ToyPlan~')
-        labels['第一次打开的时间'] = toga.Label(text='第一次打开的时间:{}年{}月{}日'.format(*self.data.first_time_opened))
-        labels['总目标数'] = toga.Label(text=f'总目标数:{len(self.data.all_goals)}')
-        labels['总任务数'] = toga.Label(text=f'总任务数:{len(self.data.active_task)+len(self.data.past_task)-len(self.data.today_finish)}')
-        labels['今天完成的任务'] = toga.Label(text=f'今天完成的任务:{len(self.data.today_finish)}')
-        labels['所有已经完成的任务'] = toga.Label(text=f'所有已经完成的任务:{len(self.data.past_task)}')
+        labels['第一次打开的时间'] = toga.Label(text='第一次打开的时间:{}年{}月{}日'.format(*statistics['first_time_opened']))
+        labels['总目标数'] = toga.Label(text=f'总目标数:{statistics["goals"]}')
+        labels['总任务数'] = toga.Label(text=f'总任务数:{statistics["tasks"]}')
+        labels['今天完成的任务'] = toga.Label(text=f'今天完成的任务:{statistics["today_finished"]}')
+        labels['所有已经完成的任务'] = toga.Label(text=f'所有已经完成的任务:{statistics["finished"]}')
+        labels['关键路径'] = toga.Label(text='关键路径:' + ' -> '.join(statistics['critical_path']))
         
 
         self.box.add(*labels.values())
@@ -492,8 +931,20 @@ class Detail_interface(toga.Box):
                 f"({group.parent_goal.name}):{group.name}" for group in DATA.all_groups
                 ]
             )
+        self.remind_switch = toga.Switch(text="开启提醒")
+        self.remind_time_label = toga.Label(text="提醒时间:")
+        self.remind_time_bar = toga.TimeInput()
+        self.remind_before_label = toga.Label(text="提前分钟数:")
+        self.remind_before_bar = toga.NumberInput(step=1, min=0, value=0)
         self.description_label = toga.Label(text="任务描述")
         self.description_bar = toga.MultilineTextInput()
+        self.before_task_label = toga.Label(text="前置任务(完成后才能开始)")
+        #序号保证同名任务也不会合并
+        self.before_task_dic = {
+            f"{i}.{task.name}({task.parent_group.name})":task
+            for i, task in enumerate((task for task in self.data.active_task if not task.is_finished), start=1)
+            }
+        self.before_task_bar = toga.Selection(items=["无"] + list(self.before_task_dic))
 
 
         self.detail_box.add(
@@ -505,6 +956,10 @@ class Detail_interface(toga.Box):
             self.importance_label, self.importance_bar,
             self.parent_group_label,self.parent_group_bar,
             self.tags_label,self.tags_bar,
+            self.before_task_label,self.before_task_bar,
+            self.remind_switch,
+            self.remind_time_label,self.remind_time_bar,
+            self.remind_before_label,self.remind_before_bar,
             self.description_label,self.description_bar
         )
 
@@ -553,6 +1008,18 @@ class Detail_interface(toga.Box):
         )
         #添加任务到数据库
         self.data.active_task.append(task)
+        self.data.task_graph.add_task(task)
+        if self.before_task_bar.value in self.before_task_dic:
+            self.data.task_graph.add_edge(self.before_task_dic[self.before_task_bar.value], task)
+        #添加提醒
+        if self.remind_switch.value:
+            reminder = Reminder(
+                task=task,
+                time_of_day=(self.remind_time_bar.value.hour, self.remind_time_bar.value.minute),
+                minutes_before=int(self.remind_before_bar.value)
+            )
+            task.reminders.append(reminder)
+            self.app.reminder_scheduler.add(reminder)
         #更新数据库
         self.data.update()
         
@@ -642,6 +1109,256 @@ class New_group_interface(toga.Box):
         self.app.goal_interface.update()
 
 
+#############################################################
+'''本地接口模块.'''
+
+class LocalServer:
+    """本地HTTP/JSON接口.
+
+    运行在ToyList的asyncio事件循环上, 和界面的点击一样串行地修改数据.
+    HTTP/1.1支持keep-alive, 列表分页并以chunked方式流式发送;
+    HTTP/1.0用Content-Length发送后关闭连接.
+    ETag由数据版本号和日期组成, If-None-Match命中时返回304.
+    Host不是本机地址的请求一律拒绝, 防止浏览器的DNS重绑定(浏览器总会发送Host,
+    所以没有Host的请求, 如HTTP/1.0的命令行工具, 可以放行).
+
+    GET  /today                 今天的任务
+    GET  /schedule?days=7       日程
+    GET  /goals                 目标与任务组(只含任务数)
+    GET  /goals/<序号>/tasks    目标下的任务
+    GET  /statistics            统计
+    POST /tasks/<id>/finish     完成一次任务
+    列表接口接受offset与limit参数.
+    """
+    STATUS = {
+        200: "OK", 304: "Not Modified", 400: "Bad Request", 403: "Forbidden",
+        404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+    }
+
+    def __init__(self, app, data, host="127.0.0.1", port=8765, page_size=50, keep_alive_timeout=15):
+        self.app = app
+        self.data = data
+        self.host = host
+        self.port = port
+        self.page_size = page_size
+        self.keep_alive_timeout = keep_alive_timeout
+        self.server = None
+
+    async def start(self):
+        """开始监听, 端口被占用等情况会抛出OSError."""
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        #port为0时由系统分配
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def allowed_hosts(self):
+        return {f"{host}:{self.port}" for host in ("127.0.0.1", "localhost", self.host)}
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+    def etag(self):
+        #今天的任务随日期变化, 所以日期也算进版本里
+        return f'"{self.data.version}-{date.today().isoformat()}"'
+
+    @staticmethod
+    def task_json(task):
+        return {
+            "id": id(task), #进程内有效
+            "name": task.name,
+            "start_date": date(*task.start_date).isoformat(),
+            "end_date": date(*task.end_date).isoformat(),
+            "date_step": task.date_step,
+            "importance": task.importance,
+            "excp_times": task.excp_times,
+            "finished_times": task.finished_times,
+            "is_finished": task.is_finished,
+            "tags": list(task.tags),
+            "group": task.parent_group.name,
+            "goal": task.parent_group.parent_goal.name,
+            "description": task.description,
+        }
+
+    def find_task(self, task_id):
+        for task in self.data.active_task + self.data.past_task:
+            if id(task) == task_id:
+                return task
+        return None
+
+    async def handle(self, reader, writer):
+        """处理一个连接上的全部请求."""
+        try:
+            while True:
+                line = await asyncio.wait_for(reader.readline(), self.keep_alive_timeout)
+                if not line:
+                    break
+                request = line.decode("latin-1").split()
+                if len(request) != 3 or not request[2].startswith("HTTP/1."):
+                    await self.send(writer, 400, {"error": "bad request line"}, {"Connection": "close"})
+                    break
+                method, target, version = request
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = header.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length:
+                    await reader.readexactly(length)
+
+                #HTTP/1.0不支持chunked, 每个请求后都关闭连接
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self.respond(writer, method, target, headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, method, target, headers, keep_alive):
+        """分发请求并写回响应."""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        base_headers = {"Connection": "keep-alive" if keep_alive else "close"}
+
+        if "host" in headers and headers["host"].lower() not in self.allowed_hosts():
+            return await self.send(writer, 403, {"error": "host not allowed"}, base_headers)
+
+        try:
+            if method == "POST" and len(parts) == 3 and parts[0] == "tasks" and parts[2] == "finish":
+                status, body = self.finish(int(parts[1]))
+                return await self.send(writer, status, body, base_headers)
+            if method != "GET":
+                return await self.send(writer, 405, {"error": "method not allowed"}, base_headers)
+
+            route = self.route(parts, query)
+            if route is None:
+                return await self.send(writer, 404, {"error": "not found"}, base_headers)
+
+            #数据没有变化时不需要重新生成
+            etag = self.etag()
+            base_headers["ETag"] = etag
+            if headers.get("if-none-match") == etag:
+                return await self.send(writer, 304, None, base_headers)
+
+            if isinstance(route, tuple):
+                items, to_json = route
+                offset = int(query.get("offset", 0))
+                limit = int(query.get("limit", self.page_size))
+                return await self.send_page(writer, items, to_json, offset, limit, base_headers, chunked=keep_alive)
+            return await self.send(writer, 200, route(), base_headers)
+        except ValueError:
+            return await self.send(writer, 400, {"error": "bad request"}, base_headers)
+
+    def finish(self, task_id):
+        """完成一次任务, 和点击任务按钮的效果相同."""
+        task = self.find_task(task_id)
+        if task is None:
+            return 404, {"error": "task not found"}
+        if task.is_finished:
+            return 409, {"error": "task already finished"}
+        #和界面一样只能完成今天的任务, 等待前置任务或还没开始的任务不行
+        if task not in self.data.today_task:
+            return 409, {"error": "task not available today"}
+        self.app.finish_task(task)
+        self.app.task_interface.update()
+        return 200, self.task_json(task)
+
+    def route(self, parts, query):
+        """GET请求的路由. 列表返回(序列, 转换函数), 先分页再转换;
+        对象返回生成函数; 找不到返回None."""
+        if parts == ["today"]:
+            return self.data.today_task, self.task_json
+        if parts == ["schedule"]:
+            days = int(query.get("days", 7))
+            if not 0 < days <= 366:
+                raise ValueError(days)
+            return list(self.data.schedule(days=days).items()), self.day_json
+        if parts == ["goals"]:
+            return list(enumerate(self.data.all_goals)), self.goal_json
+        if len(parts) == 3 and parts[0] == "goals" and parts[2] == "tasks":
+            index = int(parts[1])
+            if not 0 <= index < len(self.data.all_goals):
+                return None
+            goal = self.data.all_goals[index]
+            return [task for group in goal.subgroup for task in group.subtask], self.task_json
+        if parts == ["statistics"]:
+            return self.statistics_json
+        return None
+
+    def day_json(self, day):
+        i, tasks = day
+        return {
+            "date": (date.today()+timedelta(days=i)).isoformat(),
+            "tasks": [{"id": id(task), "waiting": not self.data.task_graph.is_ready(task)} for task in tasks],
+        }
+
+    @staticmethod
+    def goal_json(item):
+        index, goal = item
+        return {
+            "index": index,
+            "name": goal.name,
+            "groups": [{"name": group.name, "tasks": len(group.subtask)} for group in goal.subgroup],
+        }
+
+    def statistics_json(self):
+        statistics = self.data.statistics()
+        statistics["first_time_opened"] = date(*statistics["first_time_opened"]).isoformat()
+        return statistics
+
+    def head(self, status, headers):
+        lines = [f"HTTP/1.1 {status} {self.STATUS[status]}"]
+        lines += [f"{key}: {value}" for key, value in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def send(self, writer, status, body, headers):
+        """发送一个完整的JSON响应."""
+        payload = b"" if body is None else json.dumps(body, ensure_ascii=False).encode()
+        headers = dict(headers)
+        if body is not None:
+            headers["Content-Type"] = "application/json; charset=utf-8"
+        headers["Content-Length"] = len(payload)
+        writer.write(self.head(status, headers) + payload)
+        await writer.drain()
+
+    async def send_page(self, writer, items, to_json, offset, limit, headers, chunked=True):
+        """分页发送列表, 只转换这一页. chunked时逐条写出, 否则整体用Content-Length发送."""
+        if offset < 0 or limit <= 0:
+            raise ValueError(offset, limit)
+        page = items[offset:offset+limit]
+        next_offset = offset + limit if offset + limit < len(items) else None
+
+        def generate():
+            yield f'{{"total": {len(items)}, "offset": {offset}, "next": {json.dumps(next_offset)}, "items": ['
+            for i, item in enumerate(page):
+                yield ("," if i else "") + json.dumps(to_json(item), ensure_ascii=False)
+            yield "]}"
+        pieces = generate()
+
+        headers = dict(headers)
+        headers["Content-Type"] = "application/json; charset=utf-8"
+        if not chunked:
+            payload = "".join(pieces).encode()
+            headers["Content-Length"] = len(payload)
+            writer.write(self.head(200, headers) + payload)
+            await writer.drain()
+            return
+
+        headers["Transfer-Encoding"] = "chunked"
+        writer.write(self.head(200, headers))
+        for piece in pieces:
+            data = piece.encode()
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
 #############################################################
 #数据载入模块, 本地读取已有任务
 
@@ -685,6 +1402,49 @@ class ToyList(toga.App):
         self.main_window.size = (size, 1.618*size)
         self.main_window.show()
 
+        #提醒调度器, 启动时补发错过的提醒
+        self.reminder_scheduler = ReminderScheduler(DATA, loop=self.loop, on_remind=self.on_remind)
+        self.reminder_scheduler.start()
+
+        #设置了TOYPLAN_API_PORT时开启本地接口
+        self.local_server = None
+        port = os.environ.get("TOYPLAN_API_PORT")
+        if port:
+            self.local_server = LocalServer(self, DATA, port=int(port))
+            self.local_server_task = self.loop.create_task(self.start_local_server())
+        self.on_exit = self.exit_handler
+
+    async def start_local_server(self):
+        """开启本地接口, 失败时提示用户."""
+        try:
+            await self.local_server.start()
+        except OSError as error:
+            self.local_server = None
+            self.main_window.error_dialog(title="本地接口开启失败", message=f"无法监听端口: {error}")
+
+    def exit_handler(self, app, **kwargs):
+        """退出前关闭本地接口."""
+        if self.local_server is not None:
+            self.local_server.close()
+        return True
+
+    def finish_task(self, task):
+        """完成一次任务, 界面和本地接口共用."""
+        task.finish()
+        #只重新计算这个任务的下游
+        DATA.task_graph.update(task)
+        DATA.update()
+        if task.is_finished:
+            for reminder in task.reminders:
+                self.reminder_scheduler.cancel(reminder)
+
+    def on_remind(self, reminders):
+        """合并显示同时到期的提醒."""
+        self.main_window.info_dialog(
+            title="任务提醒",
+            message="\n".join(str(reminder) for reminder in reminders)
+        )
+
     def switch_to(self, *interface):
         """"""
         self.main_box.clear()
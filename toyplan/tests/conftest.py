@@ -0,0 +1,30 @@
+import sys
+import types
+
+# 测试环境里可能没有安装toga. 用一个只记录子控件的假控件代替所有toga控件,
+# 足够测试数据结构, 调度和页面缓存.
+try:
+    import toga  # noqa: F401
+except ImportError:
+    toga = types.ModuleType("toga")
+    style = types.ModuleType("toga.style")
+    pack = types.ModuleType("toga.style.pack")
+
+    class Widget:
+        def __init__(self, *args, children=(), style=None, **kwargs):
+            self.style = style if style is not None else types.SimpleNamespace()
+            self.children = list(children)
+
+        def add(self, *children):
+            self.children.extend(children)
+
+        def clear(self):
+            self.children.clear()
+
+    toga.__getattr__ = lambda name: Widget
+    toga.style = style
+    style.Pack = Widget
+    style.pack = pack
+    pack.COLUMN = "column"
+    pack.ROW = "row"
+    sys.modules.update({"toga": toga, "toga.style": style, "toga.style.pack": pack})
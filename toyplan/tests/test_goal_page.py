@@ -0,0 +1,70 @@
+from toyplan.app import Data, Goal, Goal_interface, Group, Task
+
+
+def make_interface(monkeypatch, goals=1):
+    """返回界面与每个目标被构建页面的次数."""
+    data = Data()
+    data.all_goals += [Goal(name=f"目标{i}") for i in range(1, goals)]
+    builds = {}
+    build_page = Goal.build_page
+
+    def counting_build_page(goal):
+        builds[goal] = builds.get(goal, 0) + 1
+        return build_page(goal)
+
+    monkeypatch.setattr(Goal, "build_page", counting_build_page)
+    return Goal_interface(data), data, builds
+
+
+def test_revisit_reuses_page(monkeypatch):
+    interface, data, builds = make_interface(monkeypatch)
+    goal = data.default_goal
+    page = interface.page(goal)
+    #切换标签页会重新调用update
+    interface.update()
+    assert interface.page(goal) is page
+    assert builds[goal] == 1
+
+
+def test_changes_invalidate_page(monkeypatch):
+    interface, data, builds = make_interface(monkeypatch)
+    goal = data.default_goal
+    page = interface.page(goal)
+
+    group = Group(name="新组", parent_goal=goal)
+    assert interface.page(goal) is not page
+
+    task = Task(
+        name="任务", start_date=data.first_time_opened, end_date=data.first_time_opened,
+        date_step=1, importance=0, excp_times=1, tags=(), parent_group=group, description="",
+    )
+    page = interface.page(goal)
+    task.finish()
+    assert interface.page(goal) is not page
+    assert builds[goal] == 4
+
+
+def test_other_goal_change_keeps_page(monkeypatch):
+    interface, data, builds = make_interface(monkeypatch, goals=2)
+    goal, other = data.all_goals
+    page = interface.page(goal)
+    Group(name="新组", parent_goal=other)
+    assert interface.page(goal) is page
+
+
+def test_least_recently_used_page_evicted(monkeypatch):
+    interface, data, builds = make_interface(monkeypatch, goals=9)
+    goals = data.all_goals
+    for goal in goals[:8]:
+        interface.page(goal)
+    #再访问第一个目标, 第二个目标变成最久没用的
+    interface.page(goals[0])
+    interface.page(goals[8])
+
+    assert len(interface.page_cache) == 8
+    assert goals[1] not in interface.page_cache
+    assert goals[0] in interface.page_cache
+    interface.page(goals[0])
+    assert builds[goals[0]] == 1
+    interface.page(goals[1])
+    assert builds[goals[1]] == 2
@@ -0,0 +1,249 @@
+import asyncio
+import json
+
+from toyplan.app import Data, LocalServer, Task
+
+
+class FakeApp:
+    """只提供LocalServer用到的部分."""
+    def __init__(self, data):
+        self.data = data
+        self.task_interface = self
+        self.updated = 0
+
+    def finish_task(self, task):
+        task.finish()
+        self.data.update()
+
+    def update(self):
+        self.updated += 1
+
+
+def make_data(tasks=3):
+    data = Data()
+    for i in range(tasks):
+        data.active_task.append(Task(
+            name=f"任务{i}", start_date=data.first_time_opened, end_date=data.first_time_opened,
+            date_step=1, importance=0, excp_times=1, tags=(), parent_group=data.default_group,
+            description="",
+        ))
+    data.update()
+    return data
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line == b"\r\n":
+            break
+        key, _, value = line.decode().partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    if "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        body = b""
+        while True:
+            size = int(await reader.readline(), 16)
+            chunk = await reader.readexactly(size + 2)
+            if size == 0:
+                break
+            body += chunk[:-2]
+    else:
+        body = b""
+    return status, headers, json.loads(body) if body else None
+
+
+def run_server(data, client, **kwargs):
+    """启动服务器, 运行client(server)后关闭."""
+    async def main():
+        server = LocalServer(FakeApp(data), data, port=0, **kwargs)
+        await server.start()
+        try:
+            return await client(server)
+        finally:
+            server.close()
+    return asyncio.run(main())
+
+
+def request(method, path, port, version="HTTP/1.1", headers=None, host=True):
+    headers = {"Host": f"127.0.0.1:{port}", **(headers or {})}
+    if not host:
+        del headers["Host"]
+    lines = [f"{method} {path} {version}"] + [f"{key}: {value}" for key, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+def test_keep_alive_etag_and_pagination():
+    data = make_data(tasks=3)
+
+    async def client(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        #同一个连接上连续发送多个请求
+        writer.write(request("GET", "/today?limit=2", server.port))
+        status, headers, body = await read_response(reader)
+        assert status == 200
+        assert headers["transfer-encoding"] == "chunked"
+        assert (body["total"], body["next"], len(body["items"])) == (4, 2, 2)
+
+        writer.write(request("GET", "/today?offset=2&limit=2", server.port))
+        status, _, page = await read_response(reader)
+        assert (page["next"], len(page["items"])) == (None, 2)
+
+        writer.write(request("GET", "/today", server.port, headers={"If-None-Match": headers["etag"]}))
+        status, _, body = await read_response(reader)
+        assert (status, body) == (304, None)
+
+        #完成任务后版本变化
+        task_id = page["items"][-1]["id"]
+        writer.write(request("POST", f"/tasks/{task_id}/finish", server.port))
+        status, _, body = await read_response(reader)
+        assert status == 200 and body["is_finished"]
+
+        writer.write(request("GET", "/today", server.port, headers={"If-None-Match": headers["etag"]}))
+        status, new_headers, _ = await read_response(reader)
+        assert status == 200 and new_headers["etag"] != headers["etag"]
+
+        writer.write(request("POST", f"/tasks/{task_id}/finish", server.port))
+        status, _, _ = await read_response(reader)
+        assert status == 409
+        writer.close()
+
+    run_server(data, client)
+
+
+def test_errors():
+    data = make_data()
+
+    async def client(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        for method, path, expected in [
+            ("GET", "/nope", 404),
+            ("GET", "/schedule?days=x", 400),
+            ("GET", "/today?limit=0", 400),
+            ("POST", "/tasks/1/finish", 404),
+            ("PUT", "/today", 405),
+        ]:
+            writer.write(request(method, path, server.port))
+            status, _, _ = await read_response(reader)
+            assert status == expected, path
+        writer.close()
+
+        #格式错误的请求行
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"GARBAGE\r\n\r\n")
+        status, headers, _ = await read_response(reader)
+        assert (status, headers["connection"]) == (400, "close")
+        assert await reader.read() == b""
+        writer.close()
+
+    run_server(data, client)
+
+
+def test_http10_uses_content_length_and_closes():
+    data = make_data()
+
+    async def client(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        #命令行工具的HTTP/1.0请求可能没有Host
+        writer.write(request("GET", "/today", server.port, version="HTTP/1.0", host=False))
+        status, headers, body = await read_response(reader)
+        assert status == 200
+        assert "transfer-encoding" not in headers
+        assert headers["connection"] == "close"
+        assert body["total"] == len(data.today_task)
+        assert await reader.read() == b""
+        writer.close()
+
+    run_server(data, client)
+
+
+def test_foreign_host_rejected():
+    data = make_data()
+    task = data.today_task[0]
+
+    async def client(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(request("POST", f"/tasks/{id(task)}/finish", server.port, headers={"Host": "evil.example:80"}))
+        status, _, _ = await read_response(reader)
+        assert status == 403
+        writer.write(request("GET", "/statistics", server.port, headers={"Host": f"localhost:{server.port}"}))
+        status, _, body = await read_response(reader)
+        assert status == 200 and body["goals"] == 1
+        writer.close()
+
+    run_server(data, client)
+    assert task.finished_times == 0
+
+
+def test_cannot_finish_tasks_not_available_today():
+    data = make_data(tasks=2)
+    before, blocked = data.active_task[-2:]
+    data.task_graph.add_edge(before, blocked)
+    future = Task(
+        name="以后", start_date=(2099, 1, 1), end_date=(2099, 1, 2), date_step=1, importance=0,
+        excp_times=1, tags=(), parent_group=data.default_group, description="",
+    )
+    data.active_task.append(future)
+    data.update()
+
+    async def client(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        for task in (blocked, future):
+            writer.write(request("POST", f"/tasks/{id(task)}/finish", server.port))
+            status, _, _ = await read_response(reader)
+            assert status == 409
+        writer.close()
+
+    run_server(data, client)
+    assert not blocked.is_finished and not future.is_finished
+
+
+def test_pages_serialize_only_requested_items(monkeypatch):
+    data = make_data(tasks=5)
+    serialized = []
+    task_json = LocalServer.task_json
+    monkeypatch.setattr(LocalServer, "task_json", staticmethod(lambda task: serialized.append(task) or task_json(task)))
+
+    async def client(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(request("GET", "/today?offset=1&limit=2", server.port))
+        _, _, body = await read_response(reader)
+        assert [item["name"] for item in body["items"]] == ["任务0", "任务1"]
+        assert serialized == data.today_task[1:3]
+
+        writer.write(request("GET", "/goals", server.port))
+        _, _, body = await read_response(reader)
+        assert body["items"] == [{"index": 0, "name": "日常", "groups": [{"name": "默认组", "tasks": 6}]}]
+
+        writer.write(request("GET", "/goals/0/tasks?offset=4", server.port))
+        _, _, body = await read_response(reader)
+        assert (body["total"], len(body["items"])) == (6, 2)
+
+        writer.write(request("GET", "/goals/9/tasks", server.port))
+        status, _, _ = await read_response(reader)
+        assert status == 404
+        writer.close()
+
+    run_server(data, client)
+
+
+def test_schedule_marks_waiting_tasks():
+    data = make_data(tasks=2)
+    before, blocked = data.active_task[-2:]
+    blocked.end_date = (2099, 1, 1)
+    data.task_graph.add_edge(before, blocked)
+    data.update()
+
+    async def client(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(request("GET", "/schedule?days=3", server.port))
+        _, _, body = await read_response(reader)
+        waiting = {task["id"]: task["waiting"] for day in body["items"] for task in day["tasks"]}
+        assert waiting[id(blocked)] and not waiting[id(before)]
+        writer.close()
+
+    run_server(data, client)
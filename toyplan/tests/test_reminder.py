@@ -0,0 +1,87 @@
+import random
+from datetime import datetime
+
+from toyplan.app import Goal, Group, Reminder, Task, TimerWheel, to_minute
+
+
+def make_task(start_date=(2026, 10, 1), end_date=(2026, 10, 31), date_step=3, excp_times=5):
+    group = Group(name="组", parent_goal=Goal(name="目标"))
+    return Task(
+        name="任务", start_date=start_date, end_date=end_date, date_step=date_step,
+        importance=0, excp_times=excp_times, tags=(), parent_group=group, description="",
+    )
+
+
+def minute(*args):
+    return to_minute(datetime(*args))
+
+
+def test_wheel_matches_brute_force():
+    """时间轮的到期结果与next_wakeup都和逐个比较的结果一致."""
+    for seed in range(200):
+        rnd = random.Random(seed)
+        current = rnd.randrange(10**7)
+        wheel = TimerWheel(current)
+        pending = {}
+        for _ in range(200):
+            op = rnd.random()
+            if op < 0.5:
+                entry = object()
+                expiry = current + int(10**rnd.uniform(0, 7)) - 5
+                wheel.insert(entry, expiry)
+                pending[entry] = expiry
+            elif op < 0.6 and pending:
+                entry = rnd.choice(list(pending))
+                wheel.cancel(entry)
+                del pending[entry]
+            else:
+                now = current + int(10**rnd.uniform(0, 6.5))
+                due = wheel.advance(now)
+                expected = {entry for entry, expiry in pending.items() if expiry <= now}
+                assert {entry for _, entry in due} == expected
+                assert [expiry for expiry, _ in due] == sorted(expiry for expiry, _ in due)
+                for entry in expected:
+                    del pending[entry]
+                current = now + 1
+
+            wakeup = wheel.next_wakeup()
+            if pending:
+                # 不能晚于最早的到期时间(已过期的条目在current处理)
+                assert wakeup is not None
+                assert wakeup <= max(min(pending.values()), wheel.current)
+            assert len(wheel) == len(pending)
+
+
+def test_wheel_wakeup_before_cascade():
+    wheel = TimerWheel(64000)
+    wheel.insert("X", 64100)
+    wheel.advance(64060)
+    wheel.insert("Y", 64110)
+    assert wheel.next_wakeup() <= 64100
+    assert wheel.advance(64100) == [(64100, "X")]
+
+
+def test_next_fire_steps_and_minutes_before():
+    reminder = Reminder(make_task(), time_of_day=(8, 30), minutes_before=15)
+    assert reminder.next_fire(0) == minute(2026, 10, 1, 8, 15)
+    assert reminder.next_fire(minute(2026, 10, 1, 8, 15)) == minute(2026, 10, 4, 8, 15)
+    assert reminder.next_fire(minute(2026, 10, 19, 12)) == minute(2026, 10, 22, 8, 15)
+
+
+def test_next_fire_end_date():
+    reminder = Reminder(make_task(), time_of_day=(8, 30))
+    # 最后一次执行日是10月31日
+    assert reminder.next_fire(minute(2026, 10, 28, 9)) == minute(2026, 10, 31, 8, 30)
+    assert reminder.next_fire(minute(2026, 10, 31, 9)) is None
+
+
+def test_next_fire_no_repeat():
+    reminder = Reminder(make_task(), time_of_day=(8, 30), repeat=False)
+    assert reminder.next_fire(0) == minute(2026, 10, 1, 8, 30)
+    assert reminder.next_fire(minute(2026, 10, 1, 8, 30)) is None
+
+
+def test_next_fire_finished_task():
+    task = make_task(excp_times=1)
+    task.finish()
+    assert Reminder(task).next_fire(0) is None
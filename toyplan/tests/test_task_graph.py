@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+
+import pytest
+
+from toyplan import app
+from toyplan.app import Data, Goal, Group, Task, TaskGraph
+
+
+GROUP = Group(name="组", parent_goal=Goal(name="目标"))
+
+
+def make_task(name, start_date=(2026, 1, 1), date_step=2, excp_times=3):
+    return Task(
+        name=name, start_date=start_date, end_date=(2030, 12, 31), date_step=date_step,
+        importance=0, excp_times=excp_times, tags=(), parent_group=GROUP, description="",
+    )
+
+
+def days_ago(days):
+    return tuple((date.today() - timedelta(days=days)).timetuple()[0:3])
+
+
+def test_cycle_rejected():
+    a, b, c = make_task("a"), make_task("b"), make_task("c")
+    graph = TaskGraph()
+    graph.add_edge(a, b)
+    graph.add_edge(b, c)
+    with pytest.raises(ValueError):
+        graph.add_edge(c, a)
+    with pytest.raises(ValueError):
+        graph.add_edge(a, a)
+    assert a not in graph.successors[c]
+
+
+def test_reorder_keeps_topological_order():
+    tasks = [make_task(str(i)) for i in range(6)]
+    graph = TaskGraph()
+    #按相反的顺序加入, 每条边都需要重排
+    for task in reversed(tasks):
+        graph.add_task(task)
+    for before, after in zip(tasks, tasks[1:]):
+        graph.add_edge(before, after)
+    graph.add_edge(tasks[0], tasks[5])
+    for before in graph.successors:
+        for after in graph.successors[before]:
+            assert graph.order[before] < graph.order[after]
+
+
+def test_earliest_start_and_critical_path():
+    future = (date.today() + timedelta(days=10)).timetuple()[0:3]
+    a = make_task("a", start_date=future)
+    b = make_task("b", start_date=future, excp_times=1)
+    c = make_task("c", start_date=future)
+    graph = TaskGraph()
+    graph.add_edge(a, b)
+    graph.add_edge(b, c)
+    #a做三次, 每两天一次, 第五天完成, b第六天开始并完成, c第七天开始
+    assert graph.start_date(b) == date(*future) + timedelta(days=5)
+    assert graph.start_date(c) == date(*future) + timedelta(days=6)
+    assert graph.critical_path() == [a, b, c]
+
+
+def test_unfinished_predecessor_not_in_past():
+    a = make_task("a", start_date=days_ago(5), excp_times=1)
+    b = make_task("b", start_date=days_ago(5), excp_times=1)
+    graph = TaskGraph()
+    graph.add_edge(a, b)
+    assert graph.start_date(b) == date.today() + timedelta(days=1)
+
+
+def test_finish_only_propagates_downstream():
+    a, b, c, d = (make_task(name, start_date=days_ago(5), excp_times=1) for name in "abcd")
+    graph = TaskGraph()
+    graph.add_edge(a, b)
+    graph.add_edge(b, c)
+    graph.add_edge(d, c)
+
+    computed = []
+    compute = graph._compute
+    graph._compute = lambda task: computed.append(task) or compute(task)
+
+    a.finish()
+    graph.update(a)
+    assert d not in computed
+    assert set(computed) <= {a, b, c}
+    assert graph.is_ready(b)
+    assert graph.start_date(b) == date.today()
+
+
+def test_schedule_shows_blocked_tasks_at_earliest_start():
+    data = Data()
+    a = make_task("a", start_date=days_ago(5), excp_times=1)
+    b = make_task("b", start_date=days_ago(5), excp_times=1)
+    data.active_task += [a, b]
+    data.task_graph.add_edge(a, b)
+    data.update()
+    #a最早今天完成, b从明天开始, 每两天一次
+    schedule = data.schedule()
+    assert a in schedule[0]
+    assert [i for i, tasks in schedule.items() if b in tasks] == [1, 3, 5]
+    assert not data.task_graph.is_ready(b)
+    assert b not in data.today_task
+    assert data.statistics()["critical_path"][-1] == "b"
+
+
+def test_update_recomputes_after_midnight(monkeypatch):
+    data = Data()
+    a = make_task("a", start_date=days_ago(5), excp_times=1)
+    b = make_task("b", start_date=days_ago(5), excp_times=1)
+    data.active_task += [a, b]
+    data.task_graph.add_edge(a, b)
+    data.update()
+    tomorrow = date.today() + timedelta(days=1)
+    assert data.task_graph.start_date(b) == tomorrow
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return tomorrow
+
+    monkeypatch.setattr(app, "date", Tomorrow)
+    data.update()
+    assert data.task_graph.start_date(b) == tomorrow + timedelta(days=1)